@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+
+TERMINAL_EVENT_TYPES = {"result", "error"}
+HEARTBEAT_SECONDS = 10.0
+STALE_AFTER_SECONDS = 3 * HEARTBEAT_SECONDS
+
+
+class JobEventLog:
+    """Append-only, file-backed event log for a single processing job.
+
+    Each event gets a monotonically increasing ``id`` so a client that lost
+    its connection can resume with ``after=<last id>`` instead of receiving
+    the whole log again. Only the first terminal event is written; later
+    ones are dropped and ``emit`` returns ``None``.
+    """
+
+    def __init__(self, job_id: str, path: Path) -> None:
+        self.job_id = job_id
+        self.path = path
+        self.finished = False
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.path.touch()
+
+    def emit(self, event_type: str, **fields) -> Optional[Dict]:
+        with self._lock:
+            if self.finished:
+                return None
+            if event_type in TERMINAL_EVENT_TYPES:
+                self.finished = True
+                fields.setdefault("event_count", self._next_id)
+            event = {"id": self._next_id, "type": event_type, **fields}
+            self._next_id += 1
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write(f"{json.dumps(event, ensure_ascii=False)}\n")
+        return event
+
+    def log(self, message: str) -> Optional[Dict]:
+        return self.emit("log", message=message)
+
+    def error(self, message: str) -> Optional[Dict]:
+        return self.emit("error", message=message)
+
+    def result(self, **fields) -> Optional[Dict]:
+        return self.emit("result", **fields)
+
+    def heartbeat(self) -> None:
+        """Mark the job as alive for followers in any worker."""
+        os.utime(self.path)
+
+
+def read_events(path: Path, offset: int = 0) -> Tuple[List[Dict], int]:
+    """Read complete events written after byte ``offset``.
+
+    Returns the parsed events and the offset to continue from. A trailing
+    line that is still being written is left for the next call.
+    """
+    events: List[Dict] = []
+    with path.open("rb") as handle:
+        handle.seek(offset)
+        data = handle.read()
+    end = data.rfind(b"\n")
+    if end == -1:
+        return events, offset
+    for line in data[: end + 1].splitlines():
+        if line.strip():
+            events.append(json.loads(line))
+    return events, offset + end + 1
+
+
+async def follow_events(
+    path: Path,
+    after: int = 0,
+    poll_interval: float = 0.25,
+    stale_after: float = STALE_AFTER_SECONDS,
+) -> AsyncIterator[Dict]:
+    """Yield events with ``id > after`` until a terminal event is seen.
+
+    The log file is polled rather than watched in memory so any worker can
+    serve a resumed stream for a job started by another worker. Running
+    jobs touch the file every ``HEARTBEAT_SECONDS``; if it has not changed
+    for ``stale_after`` seconds the job is treated as orphaned (worker
+    crash or restart) and a synthetic terminal ``error`` event is yielded.
+    """
+    offset = 0
+    last_id = 0
+    while True:
+        events, offset = read_events(path, offset)
+        for event in events:
+            last_id = max(last_id, event.get("id", 0))
+            if event.get("id", 0) <= after:
+                continue
+            yield event
+            if event.get("type") in TERMINAL_EVENT_TYPES:
+                return
+        try:
+            idle = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            idle = float("inf")
+        if not events and idle > stale_after:
+            # Not persisted: only the job itself writes to its log, so
+            # concurrent followers cannot duplicate ids or terminal events.
+            yield {
+                "id": last_id + 1,
+                "type": "error",
+                "message": "Job stopped responding before it finished.",
+                "event_count": last_id + 1,
+                "orphaned": True,
+            }
+            return
+        await asyncio.sleep(poll_interval)
+
+
+def prune_event_logs(directory: Path, max_age_seconds: float) -> int:
+    """Delete event logs untouched for ``max_age_seconds``. Returns the count."""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for path in directory.glob("*.ndjson"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def format_ndjson(event: Dict) -> str:
+    return f"{json.dumps(event, ensure_ascii=False)}\n"
@@ -1,8 +1,13 @@
+import asyncio
 import json
 import os
+import re
+import threading
 import time
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
@@ -10,6 +15,14 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from dotenv import load_dotenv
 
+from .events import (
+    HEARTBEAT_SECONDS,
+    JobEventLog,
+    follow_events,
+    format_ndjson,
+    prune_event_logs,
+)
+from .models import TranslationMatch, TranslationMemoryStats
 from .processing import (
     build_ssml,
     detect_intro,
@@ -19,6 +32,11 @@ from .processing import (
     split_segments_for_chunks,
     summarize_speakers,
 )
+from .translation_memory import (
+    TranslationMemory,
+    load_translation_memory,
+    protected_tokens,
+)
 from .tts_client import GeminiTtsClient
 
 
@@ -29,15 +47,82 @@ DATA_DIR = Path(os.getenv("APP_DATA_DIR", "/data"))
 UPLOAD_DIR = DATA_DIR / "uploads"
 ARTIFACT_DIR = DATA_DIR / "artifacts"
 AUDIO_DIR = DATA_DIR / "audio"
+JOB_DIR = DATA_DIR / "jobs"
 MAX_SSML_CHARS = int(os.getenv("MAX_SSML_CHARS", "5000"))
+TM_REUSE_THRESHOLD = float(os.getenv("TM_REUSE_THRESHOLD", "1.0"))
+TM_CONTEXT_THRESHOLD = float(os.getenv("TM_CONTEXT_THRESHOLD", "0.5"))
+TM_MAX_ENTRIES = int(os.getenv("TM_MAX_ENTRIES", "20000"))
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "168"))
+JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+WARM_UP_CLIENTS = os.getenv("WARM_UP_CLIENTS", "0").lower() in {"1", "true", "yes"}
+WARM_UP_ATTEMPTS = 5
+WARM_UP_DEADLINE_SECONDS = 30.0
+
+_RUNNING_JOBS: Dict[asyncio.Task, JobEventLog] = {}
+_CLIENT: Optional[GeminiTtsClient] = None
+_CLIENT_LOCK = threading.Lock()
+_WARM_UP = {
+    "status": "disabled",
+    "error": None,
+    "seconds": None,
+    "attempts": 0,
+    "started": None,
+}
+
+
+def get_client(api_key: str) -> GeminiTtsClient:
+    """Return a client shared across jobs so warm connections are reused."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT.api_key != api_key:
+            _CLIENT = GeminiTtsClient(api_key=api_key)
+        return _CLIENT
+
 
-app = FastAPI()
+def warm_up_clients(api_key: str, sleep=time.sleep) -> None:
+    """Warm the shared client, retrying with exponential backoff.
+
+    Warm-up is an optimisation: a failed attempt leaves the service ready
+    (jobs build their client lazily) and only changes the reported status.
+    """
+    started = time.monotonic()
+    _WARM_UP.update(
+        status="warming", error=None, seconds=None, attempts=0, started=started
+    )
+    for attempt in range(1, WARM_UP_ATTEMPTS + 1):
+        _WARM_UP["attempts"] = attempt
+        try:
+            get_client(api_key).warm_up()
+        except Exception as exc:
+            _WARM_UP.update(status="failed", error=str(exc))
+            if attempt < WARM_UP_ATTEMPTS:
+                sleep(min(2 ** (attempt - 1), 30))
+        else:
+            _WARM_UP.update(status="warm", error=None)
+            break
+    _WARM_UP["seconds"] = round(time.monotonic() - started, 3)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if WARM_UP_CLIENTS and api_key:
+        threading.Thread(
+            target=warm_up_clients, args=(api_key,), name="warm-up", daemon=True
+        ).start()
+    yield
+    for events in list(_RUNNING_JOBS.values()):
+        events.error("Server shut down before the job finished.")
+
+
+app = FastAPI(lifespan=lifespan)
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
 
 def ensure_dirs() -> None:
-    for path in (UPLOAD_DIR, ARTIFACT_DIR, AUDIO_DIR):
+    for path in (UPLOAD_DIR, ARTIFACT_DIR, AUDIO_DIR, JOB_DIR):
         path.mkdir(parents=True, exist_ok=True)
 
 
@@ -46,6 +131,20 @@ def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/ready")
+def ready():
+    # Only the first warm-up attempt holds back traffic, and for at most
+    # WARM_UP_DEADLINE_SECONDS; the service works with a cold client.
+    ok = _WARM_UP["status"] != "warming" or (
+        time.monotonic() - _WARM_UP["started"] > WARM_UP_DEADLINE_SECONDS
+    )
+    clients = {key: value for key, value in _WARM_UP.items() if key != "started"}
+    return JSONResponse(
+        {"ready": ok, "clients": clients},
+        status_code=200 if ok else 503,
+    )
+
+
 @app.post("/process")
 async def process_file(
     file: UploadFile = File(...),
@@ -60,9 +159,8 @@ async def process_file(
     if not api_key:
         raise HTTPException(status_code=500, detail="GOOGLE_API_KEY is not configured")
 
-    timestamp = int(time.time())
-    filename = f"{timestamp}_{file.filename}"
-    upload_path = UPLOAD_DIR / filename
+    job_id = uuid.uuid4().hex
+    upload_path = UPLOAD_DIR / f"{job_id}_{file.filename}"
     try:
         content = await file.read()
     except Exception as exc:
@@ -70,129 +168,251 @@ async def process_file(
     finally:
         await file.close()
 
-    async def stream():
-        logs: List[str] = []
+    prune_event_logs(JOB_DIR, JOB_RETENTION_HOURS * 3600)
+    events = JobEventLog(job_id, JOB_DIR / f"{job_id}.ndjson")
+    events.emit("job", job_id=job_id)
+    task = asyncio.create_task(
+        _run_in_background(
+            events,
+            content,
+            upload_path,
+            api_key,
+            input_language,
+            output_language,
+            sample_rate_hz,
+            volume_gain_db,
+            voice_map_json,
+        )
+    )
+    _RUNNING_JOBS[task] = events
+    task.add_done_callback(lambda done: _RUNNING_JOBS.pop(done, None))
+
+    return StreamingResponse(
+        _stream_events(events.path), media_type="application/x-ndjson"
+    )
+
+
+async def _run_in_background(events: JobEventLog, *args) -> None:
+    worker = asyncio.ensure_future(asyncio.to_thread(run_job, events, *args))
+    try:
+        while not worker.done():
+            events.heartbeat()
+            await asyncio.wait({worker}, timeout=HEARTBEAT_SECONDS)
+        worker.result()
+    except BaseException as exc:
+        events.error(f"Processing failed: {str(exc) or exc.__class__.__name__}")
+        raise
+    finally:
+        # Guarantees followers a terminal event even if run_job returned
+        # without writing one.
+        events.error("Job ended without a result.")
 
-        def log(message: str) -> str:
-            logs.append(message)
-            payload = {"type": "log", "message": message}
-            return f"{json.dumps(payload, ensure_ascii=False)}\n"
 
-        def error(message: str) -> str:
-            payload = {"type": "error", "message": message, "logs": logs}
-            return f"{json.dumps(payload, ensure_ascii=False)}\n"
+def run_job(
+    events: JobEventLog,
+    content: bytes,
+    upload_path: Path,
+    api_key: str,
+    input_language: str,
+    output_language: str,
+    sample_rate_hz: int,
+    volume_gain_db: float,
+    voice_map_json: str,
+) -> None:
+    log = events.log
+    job_id = events.job_id
+    try:
+        log("Reading upload...")
+        upload_path.write_bytes(content)
+        log(f"Saved upload to {upload_path}")
 
         try:
-            yield log("Reading upload...")
-            upload_path.write_bytes(content)
-            yield log(f"Saved upload to {upload_path}")
-
-            try:
-                text = content.decode("utf-8")
-            except UnicodeDecodeError:
-                yield error("Input file must be UTF-8 text")
-                return
-
-            yield log("Parsing speaker segments...")
-            segments = parse_speaker_segments(text)
-            if not segments:
-                yield error("No speaker segments detected")
-                return
-            yield log(f"Detected {len(segments)} segments.")
-
-            speakers = extract_speakers(segments)
-            yield log(f"Detected speakers: {', '.join(speakers)}")
-            yield log(f"Speaker counts: {summarize_speakers(segments)}")
-
-            intro = detect_intro(segments)
-            if intro.text:
-                yield log(
-                    f"Intro detected ({intro.segment_count} segments). {intro.reason}"
-                )
-                yield log(f"Intro preview: {intro.text[:180]}...")
-            else:
-                yield log(f"No intro detected. {intro.reason}")
-
-            try:
-                voice_map: Dict[str, str] = json.loads(voice_map_json)
-            except json.JSONDecodeError:
-                yield error("Invalid voice map JSON")
-                return
-
-            client = GeminiTtsClient(api_key=api_key)
-
-            translated_segments = []
-            total_segments = len(segments)
-            for index, segment in enumerate(segments, start=1):
-                yield log(
-                    f"Translating segment {index}/{total_segments} ({segment.speaker})"
-                )
-                translated_text = client.translate_text(
-                    segment.text, input_language, output_language
-                )
-                translated_segments.append(
-                    segment.__class__(
-                        segment.speaker, segment.timestamp, translated_text
-                    )
-                )
+            text = content.decode("utf-8")
+        except UnicodeDecodeError:
+            events.error("Input file must be UTF-8 text")
+            return
+
+        log("Parsing speaker segments...")
+        segments = parse_speaker_segments(text)
+        if not segments:
+            events.error("No speaker segments detected")
+            return
+        log(f"Detected {len(segments)} segments.")
 
-            yield log("Building SSML...")
-            ssml = build_ssml(translated_segments, voice_map, output_language)
-            artifact_path = ARTIFACT_DIR / f"{timestamp}_prepared.ssml.txt"
-            artifact_path.write_text(ssml, encoding="utf-8")
-            yield log(f"Saved prepared SSML to {artifact_path}")
+        speakers = extract_speakers(segments)
+        log(f"Detected speakers: {', '.join(speakers)}")
+        log(f"Speaker counts: {summarize_speakers(segments)}")
+
+        intro = detect_intro(segments)
+        if intro.text:
+            log(
+                f"Intro detected ({intro.segment_count} segments). {intro.reason}"
+            )
+            log(f"Intro preview: {intro.text[:180]}...")
+        else:
+            log(f"No intro detected. {intro.reason}")
+
+        try:
+            voice_map: Dict[str, str] = json.loads(voice_map_json)
+        except json.JSONDecodeError:
+            events.error("Invalid voice map JSON")
+            return
 
-            chunk_needed = estimate_chunking_need(ssml, MAX_SSML_CHARS)
-            audio_paths: List[Path] = []
+        client = get_client(api_key)
 
-            if chunk_needed:
-                yield log("Input exceeds SSML limit, chunking enabled.")
-                chunk_segments = split_segments_for_chunks(
-                    translated_segments, MAX_SSML_CHARS
+        memory = load_translation_memory(
+            DATA_DIR / "translation_memory.jsonl", max_entries=TM_MAX_ENTRIES
+        )
+        memory_stats = TranslationMemoryStats()
+        translated_segments = []
+        total_segments = len(segments)
+        for index, segment in enumerate(segments, start=1):
+            log(
+                f"Translating segment {index}/{total_segments} ({segment.speaker})"
+            )
+            translated_text = _translate_with_memory(
+                client,
+                memory,
+                memory_stats,
+                segment.text,
+                input_language,
+                output_language,
+            )
+            translated_segments.append(
+                segment.__class__(
+                    segment.speaker, segment.timestamp, translated_text
                 )
-                total_chunks = len(chunk_segments)
-                yield log(f"Preparing {total_chunks} audio chunks...")
-                for index, chunk in enumerate(chunk_segments, start=1):
-                    yield log(f"Synthesizing chunk {index}/{total_chunks}")
-                    chunk_ssml = build_ssml(chunk, voice_map, output_language)
-                    audio_bytes = client.synthesize_ssml(
-                        chunk_ssml,
-                        voice_name=None,
-                        language_code=output_language,
-                        sample_rate_hz=sample_rate_hz,
-                        volume_gain_db=volume_gain_db,
+            )
+
+        log(
+            "Translation memory: "
+            f"{memory_stats.reused}/{memory_stats.lookups} reused "
+            f"({memory_stats.hit_rate:.0%} hit rate), "
+            f"{memory_stats.context} with few-shot context, "
+            f"{memory_stats.saved_chars} characters saved."
+        )
+
+        log("Building SSML...")
+        ssml = build_ssml(translated_segments, voice_map, output_language)
+        artifact_path = ARTIFACT_DIR / f"{job_id}_prepared.ssml.txt"
+        artifact_path.write_text(ssml, encoding="utf-8")
+        log(f"Saved prepared SSML to {artifact_path}")
+
+        chunk_needed = estimate_chunking_need(ssml, MAX_SSML_CHARS)
+        audio_paths: List[Path] = []
+        synth_options = {
+            "voice_name": None,
+            "language_code": output_language,
+            "sample_rate_hz": sample_rate_hz,
+            "volume_gain_db": volume_gain_db,
+        }
+
+        if chunk_needed:
+            log("Input exceeds SSML limit, chunking enabled.")
+            chunk_segments = split_segments_for_chunks(
+                translated_segments, MAX_SSML_CHARS
+            )
+            total_chunks = len(chunk_segments)
+            log(f"Preparing {total_chunks} audio chunks...")
+            for index, chunk in enumerate(chunk_segments, start=1):
+                log(f"Synthesizing chunk {index}/{total_chunks}")
+                chunk_ssml = build_ssml(chunk, voice_map, output_language)
+                part_path = AUDIO_DIR / f"{job_id}_part_{index}.mp3"
+                log(
+                    _synthesize_to_file(
+                        client, chunk_ssml, part_path, **synth_options
                     )
-                    part_path = AUDIO_DIR / f"{timestamp}_part_{index}.mp3"
-                    part_path.write_bytes(audio_bytes)
-                    audio_paths.append(part_path)
-                yield log(f"Generated {len(audio_paths)} audio chunks.")
-            else:
-                yield log("Synthesizing audio...")
-                audio_bytes = client.synthesize_ssml(
-                    ssml,
-                    voice_name=None,
-                    language_code=output_language,
-                    sample_rate_hz=sample_rate_hz,
-                    volume_gain_db=volume_gain_db,
                 )
-                audio_path = AUDIO_DIR / f"{timestamp}.mp3"
-                audio_path.write_bytes(audio_bytes)
-                audio_paths.append(audio_path)
-                yield log("Generated single audio file.")
-
-            download_urls = [f"/download?path={path.name}" for path in audio_paths]
-            payload = {
-                "type": "result",
-                "status": "ok",
-                "artifact": str(artifact_path),
-                "downloads": download_urls,
-                "logs": logs,
-            }
-            yield f"{json.dumps(payload, ensure_ascii=False)}\n"
-        except Exception as exc:
-            yield error(f"Processing failed: {exc}")
+                audio_paths.append(part_path)
+            log(f"Generated {len(audio_paths)} audio chunks.")
+        else:
+            log("Synthesizing audio...")
+            audio_path = AUDIO_DIR / f"{job_id}.mp3"
+            log(_synthesize_to_file(client, ssml, audio_path, **synth_options))
+            audio_paths.append(audio_path)
+            log("Generated single audio file.")
+
+        download_urls = [f"/download?path={path.name}" for path in audio_paths]
+        events.result(
+            status="ok",
+            artifact=str(artifact_path),
+            downloads=download_urls,
+        )
+    except Exception as exc:
+        events.error(f"Processing failed: {exc}")
+
+
+def _can_reuse(text: str, match: TranslationMatch) -> bool:
+    """Reuse verbatim only on exact matches, or on near matches above
+    ``TM_REUSE_THRESHOLD`` whose numbers, URLs and codes are unchanged."""
+    if match.exact:
+        return True
+    return (
+        TM_REUSE_THRESHOLD < 1.0
+        and match.similarity >= TM_REUSE_THRESHOLD
+        and protected_tokens(text) == protected_tokens(match.source)
+    )
+
+
+def _translate_with_memory(
+    client,
+    memory: TranslationMemory,
+    stats: TranslationMemoryStats,
+    text: str,
+    input_language: str,
+    output_language: str,
+) -> str:
+    if input_language.lower() == output_language.lower():
+        return client.translate_text(text, input_language, output_language)
+
+    stats.lookups += 1
+    match = memory.lookup(
+        text, input_language, output_language, min_similarity=TM_CONTEXT_THRESHOLD
+    )
+    if match is not None and _can_reuse(text, match):
+        stats.reused += 1
+        stats.saved_chars += len(text)
+        return match.translation
+
+    if match is not None:
+        stats.context += 1
+        translated = client.translate_text(
+            text,
+            input_language,
+            output_language,
+            examples=[(match.source, match.translation)],
+        )
+    else:
+        translated = client.translate_text(text, input_language, output_language)
+    memory.add(text, translated, input_language, output_language)
+    return translated
+
+
+def _synthesize_to_file(client, ssml: str, path: Path, **options) -> str:
+    started = time.monotonic()
+    written = client.synthesize_ssml_to_file(ssml, path, **options)
+    elapsed = max(time.monotonic() - started, 1e-6)
+    return (
+        f"Wrote {written} bytes to {path.name} "
+        f"({written / elapsed / 1024:.1f} KiB/s)"
+    )
+
+
+async def _stream_events(path: Path, after: int = 0):
+    async for event in follow_events(path, after=after):
+        yield format_ndjson(event)
+
 
-    return StreamingResponse(stream(), media_type="application/x-ndjson")
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, after: int = 0):
+    if not JOB_ID_RE.fullmatch(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    path = JOB_DIR / f"{job_id}.ndjson"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _stream_events(path, after=after), media_type="application/x-ndjson"
+    )
 
 
 @app.get("/download")
@@ -13,4 +13,24 @@ class Segment:
 class IntroInfo:
     text: str
     segment_count: int
-    reason: str
\ No newline at end of file
+    reason: str
+
+
+@dataclass
+class TranslationMatch:
+    source: str
+    translation: str
+    similarity: float
+    exact: bool = False
+
+
+@dataclass
+class TranslationMemoryStats:
+    lookups: int = 0
+    reused: int = 0
+    context: int = 0
+    saved_chars: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.reused / self.lookups if self.lookups else 0.0
@@ -35,6 +35,7 @@ const mappingContainer = document.getElementById("speaker-mapping");
 const logsEl = document.getElementById("logs");
 const downloadsEl = document.getElementById("downloads");
 const form = document.getElementById("upload-form");
+const MAX_RECONNECT_ATTEMPTS = 10;
 
 function parseSpeakers(text) {
   const lines = text.split(/\r?\n/);
@@ -130,53 +131,49 @@ form.addEventListener("submit", async (event) => {
     logsEl.textContent = logs.join("\n");
   };
 
-  try {
-    const response = await fetch("/process", {
-      method: "POST",
-      body: formData,
-    });
+  let jobId = null;
+  let lastId = 0;
+  let finished = false;
 
-    if (!response.ok) {
-      const data = await response.json();
-      logsEl.textContent = data.detail || "Processing failed.";
+  const handlePayload = (payload) => {
+    if (!payload || typeof payload !== "object") return;
+    if (typeof payload.id === "number") {
+      if (payload.id <= lastId) return;
+      lastId = payload.id;
+    }
+    if (payload.type === "job") {
+      jobId = payload.job_id;
       return;
     }
-
-    if (!response.body) {
-      logsEl.textContent = "No response stream available.";
+    if (payload.type === "log") {
+      appendLog(payload.message);
       return;
     }
+    if (payload.type === "error") {
+      finished = true;
+      appendLog(payload.message || "Processing failed.");
+      downloadsEl.innerHTML = "";
+      return;
+    }
+    if (payload.type === "result") {
+      finished = true;
+      downloadsEl.innerHTML = "";
+      (payload.downloads || []).forEach((url, index) => {
+        const link = document.createElement("a");
+        link.href = url;
+        link.textContent = `Download audio ${index + 1}`;
+        link.className = "download-link";
+        link.target = "_blank";
+        downloadsEl.appendChild(link);
+      });
+    }
+  };
 
+  const consumeStream = async (response) => {
     const reader = response.body.getReader();
     const decoder = new TextDecoder();
     let buffer = "";
 
-    const handlePayload = (payload) => {
-      if (!payload || typeof payload !== "object") return;
-      if (payload.type === "log") {
-        appendLog(payload.message);
-        return;
-      }
-      if (payload.type === "error") {
-        logsEl.textContent = payload.message || "Processing failed.";
-        downloadsEl.innerHTML = "";
-        return;
-      }
-      if (payload.type === "result") {
-        const resultLogs = Array.isArray(payload.logs) ? payload.logs : logs;
-        logsEl.textContent = resultLogs.join("\n");
-        downloadsEl.innerHTML = "";
-        (payload.downloads || []).forEach((url, index) => {
-          const link = document.createElement("a");
-          link.href = url;
-          link.textContent = `Download audio ${index + 1}`;
-          link.className = "download-link";
-          link.target = "_blank";
-          downloadsEl.appendChild(link);
-        });
-      }
-    };
-
     while (true) {
       const { value, done } = await reader.read();
       if (done) break;
@@ -203,7 +200,53 @@ form.addEventListener("submit", async (event) => {
         // Ignore trailing invalid JSON.
       }
     }
+  };
+
+  try {
+    const response = await fetch("/process", {
+      method: "POST",
+      body: formData,
+    });
+
+    if (!response.ok) {
+      const data = await response.json();
+      logsEl.textContent = data.detail || "Processing failed.";
+      return;
+    }
+
+    if (!response.body) {
+      logsEl.textContent = "No response stream available.";
+      return;
+    }
+
+    await consumeStream(response);
   } catch (error) {
-    logsEl.textContent = `Error: ${error.message}`;
+    if (!jobId) {
+      logsEl.textContent = `Error: ${error.message}`;
+      return;
+    }
+  }
+
+  let attempts = 0;
+  while (!finished && jobId && attempts < MAX_RECONNECT_ATTEMPTS) {
+    attempts += 1;
+    await new Promise((resolve) =>
+      setTimeout(resolve, Math.min(1000 * attempts, 10000))
+    );
+    try {
+      const response = await fetch(
+        `/jobs/${jobId}/events?after=${lastId}`
+      );
+      if (!response.ok || !response.body) continue;
+      const before = lastId;
+      await consumeStream(response);
+      if (lastId > before) attempts = 0;
+    } catch (error) {
+      // Connection dropped again; retry with backoff.
+    }
+  }
+
+  if (!finished) {
+    appendLog("Lost connection to the server.");
   }
 });
\ No newline at end of file
@@ -0,0 +1,344 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import zlib
+from array import array
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from .models import TranslationMatch
+from .tts_client import FILE_MODE
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+DEFAULT_MAX_ENTRIES = 20000
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_rng = random.Random(1729)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+# Tokens whose change alters meaning even when the rest of a passage is
+# identical: numbers, URLs, promo-code-like words and question/exclamation
+# marks.
+PROTECTED_TOKEN_RE = re.compile(
+    r"https?://\S+|www\.\S+|\S*\d\S*|\b[A-Z][A-Z0-9]{2,}\b|[?!]"
+)
+
+
+def normalize_whitespace(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def protected_tokens(text: str) -> List[str]:
+    return sorted(PROTECTED_TOKEN_RE.findall(text))
+
+
+def normalize_for_matching(text: str) -> str:
+    normalized = re.sub(r"[^\w\s]", "", text.lower())
+    return re.sub(r"\s+", " ", normalized).strip()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[int]:
+    normalized = normalize_for_matching(text)
+    if len(normalized) <= size:
+        return frozenset({zlib.crc32(normalized.encode("utf-8"))})
+    return frozenset(
+        zlib.crc32(normalized[i : i + size].encode("utf-8"))
+        for i in range(len(normalized) - size + 1)
+    )
+
+
+def minhash(shingle_set: FrozenSet[int]) -> Tuple[int, ...]:
+    return tuple(
+        min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in shingle_set)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(left: FrozenSet[int], right: FrozenSet[int]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+@dataclass
+class _Entry:
+    source: str
+    translation: str
+    input_language: str
+    output_language: str
+    exact_key: bytes
+    band_keys: array
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "source": self.source,
+                "translation": self.translation,
+                "input_language": self.input_language,
+                "output_language": self.output_language,
+            },
+            ensure_ascii=False,
+        )
+
+
+class TranslationMemory:
+    """Near-duplicate lookup over translations from past jobs.
+
+    Entries are persisted as JSON lines. Candidates are found with MinHash
+    LSH over character shingles and then ranked by exact Jaccard similarity,
+    recomputed from the candidate's source text. Exact matches compare
+    whitespace-normalized text, keeping case and punctuation. Only the LSH
+    band hashes are kept per entry, and at most ``max_entries`` entries are
+    held; the least recently used one is evicted first.
+
+    The file may be shared by several worker processes. Appends and
+    compaction take an exclusive ``flock`` on ``<path>.lock`` (POSIX only),
+    and compaction keeps the newest ``max_entries`` lines of the file, so
+    entries appended by other workers are not dropped.
+    """
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[int, Set[int]] = defaultdict(set)
+        self._exact: Dict[bytes, int] = {}
+        self._next_id = 0
+        self._file_lines = 0
+        self._lock = threading.Lock()
+        if path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _pair(input_language: str, output_language: str) -> Tuple[str, str]:
+        return input_language.lower(), output_language.lower()
+
+    @staticmethod
+    def _exact_key(pair: Tuple[str, str], text: str) -> bytes:
+        key = "\0".join((*pair, normalize_whitespace(text)))
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _band_keys(pair: Tuple[str, str], signature: Tuple[int, ...]) -> Iterator[int]:
+        for band in range(BANDS):
+            start = band * ROWS_PER_BAND
+            yield hash((pair, band, signature[start : start + ROWS_PER_BAND]))
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        with lock_path.open("a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        with self._file_lock():
+            entries = self._compact()
+        for entry in entries:
+            self._index(
+                entry["source"],
+                entry["translation"],
+                entry["input_language"],
+                entry["output_language"],
+            )
+
+    def _compact(self) -> List[Dict]:
+        """Rewrite the file with its newest ``max_entries`` unique entries.
+
+        Must be called with the file lock held. Reads what is on disk, so
+        entries appended by other workers are kept. Unreadable lines are
+        moved to ``<path>.rejected``. Returns the kept entries, oldest first.
+        """
+        rejected: List[str] = []
+        latest: Dict[bytes, Dict] = {}
+        lines = 0
+        with self.path.open("r", encoding="utf-8", errors="replace") as handle:
+            for number, line in enumerate(handle, start=1):
+                if not line.strip():
+                    continue
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                    pair = self._pair(entry["input_language"], entry["output_language"])
+                    key = self._exact_key(pair, entry["source"])
+                    if not isinstance(entry["translation"], str):
+                        raise TypeError("translation is not a string")
+                except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                    logger.warning(
+                        "Skipping unreadable translation memory line %s in %s: %s",
+                        number,
+                        self.path,
+                        exc,
+                    )
+                    rejected.append(line if line.endswith("\n") else f"{line}\n")
+                    continue
+                latest.pop(key, None)
+                latest[key] = entry
+        kept = list(latest.values())[-self.max_entries :]
+        if rejected:
+            rejected_path = self.path.with_name(f"{self.path.name}.rejected")
+            with rejected_path.open("a", encoding="utf-8") as handle:
+                handle.writelines(rejected)
+        if len(kept) < lines:
+            self._rewrite(kept)
+        self._file_lines = len(kept)
+        return kept
+
+    def _rewrite(self, entries: List[Dict]) -> None:
+        """Atomically replace the file with ``entries``."""
+        fd, temp_name = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".part"
+        )
+        try:
+            os.fchmod(fd, FILE_MODE)
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                for entry in entries:
+                    handle.write(f"{json.dumps(entry, ensure_ascii=False)}\n")
+            os.replace(temp_name, self.path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+    def _index(
+        self,
+        source: str,
+        translation: str,
+        input_language: str,
+        output_language: str,
+    ) -> Optional[_Entry]:
+        pair = self._pair(input_language, output_language)
+        exact_key = self._exact_key(pair, source)
+        if exact_key in self._exact:
+            return None
+        entry = _Entry(
+            source,
+            translation,
+            input_language,
+            output_language,
+            exact_key,
+            array("q", self._band_keys(pair, minhash(shingles(source)))),
+        )
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        self._exact[exact_key] = entry_id
+        for band_key in entry.band_keys:
+            self._buckets[band_key].add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        entry_id, entry = self._entries.popitem(last=False)
+        del self._exact[entry.exact_key]
+        for band_key in entry.band_keys:
+            bucket = self._buckets[band_key]
+            bucket.discard(entry_id)
+            if not bucket:
+                del self._buckets[band_key]
+
+    def lookup(
+        self,
+        text: str,
+        input_language: str,
+        output_language: str,
+        min_similarity: float = 0.0,
+    ) -> Optional[TranslationMatch]:
+        pair = self._pair(input_language, output_language)
+        with self._lock:
+            exact_id = self._exact.get(self._exact_key(pair, text))
+            if exact_id is not None:
+                self._entries.move_to_end(exact_id)
+                entry = self._entries[exact_id]
+                return TranslationMatch(
+                    entry.source, entry.translation, 1.0, exact=True
+                )
+
+            query = shingles(text)
+            candidates = set()
+            for band_key in self._band_keys(pair, minhash(query)):
+                candidates.update(self._buckets.get(band_key, ()))
+
+            best_id: Optional[int] = None
+            best: Optional[TranslationMatch] = None
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if self._pair(entry.input_language, entry.output_language) != pair:
+                    continue
+                similarity = jaccard(query, shingles(entry.source))
+                if similarity < min_similarity:
+                    continue
+                if best is None or similarity > best.similarity:
+                    best_id = entry_id
+                    best = TranslationMatch(entry.source, entry.translation, similarity)
+            if best_id is not None:
+                self._entries.move_to_end(best_id)
+            return best
+
+    def add(
+        self,
+        source: str,
+        translation: str,
+        input_language: str,
+        output_language: str,
+    ) -> None:
+        with self._lock:
+            entry = self._index(source, translation, input_language, output_language)
+            if entry is None:
+                return
+            with self._file_lock():
+                with self.path.open("a", encoding="utf-8") as handle:
+                    handle.write(f"{entry.to_json()}\n")
+                self._file_lines += 1
+                # Evicted entries stay in the file until it is compacted.
+                if self._file_lines >= 2 * self.max_entries:
+                    self._compact()
+
+
+_MEMORIES: Dict[Path, TranslationMemory] = {}
+_MEMORIES_LOCK = threading.Lock()
+
+
+def load_translation_memory(
+    path: Path, max_entries: int = DEFAULT_MAX_ENTRIES
+) -> TranslationMemory:
+    """Return the shared memory for ``path``, loading it on first use."""
+    with _MEMORIES_LOCK:
+        memory = _MEMORIES.get(path)
+        if memory is None:
+            memory = TranslationMemory(path, max_entries=max_entries)
+            _MEMORIES[path] = memory
+        return memory
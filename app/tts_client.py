@@ -1,14 +1,40 @@
-from typing import Optional
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
 
-try:
-    from google.cloud import texttospeech
-except (ModuleNotFoundError, ImportError):  # pragma: no cover - handled by dependency install
-    texttospeech = None
+# The Google client libraries pull in grpc and protobuf, which dominate
+# import time. They are loaded on first client construction instead.
+texttospeech = None
+genai = None
 
-try:
-    from google import genai
-except (ModuleNotFoundError, ImportError):  # pragma: no cover - handled by dependency install
-    genai = None
+# Read once at import: os.umask can only be queried by setting it, which
+# is not safe once worker threads are running.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def _load_texttospeech():
+    global texttospeech
+    if texttospeech is None:
+        try:
+            from google.cloud import texttospeech as module
+        except (ModuleNotFoundError, ImportError):  # pragma: no cover - handled by dependency install
+            return None
+        texttospeech = module
+    return texttospeech
+
+
+def _load_genai():
+    global genai
+    if genai is None:
+        try:
+            from google import genai as module
+        except (ModuleNotFoundError, ImportError):  # pragma: no cover - handled by dependency install
+            return None
+        genai = module
+    return genai
 
 
 class GeminiTtsClient:
@@ -17,7 +43,7 @@ class GeminiTtsClient:
         api_key: str,
         model: str = "gemini-2.5-pro",
     ) -> None:
-        if genai is None or texttospeech is None:
+        if _load_genai() is None or _load_texttospeech() is None:
             raise RuntimeError(
                 "Missing Google client libraries. Install "
                 "google-genai and google-cloud-texttospeech."
@@ -29,12 +55,27 @@ class GeminiTtsClient:
             client_options={"api_key": api_key}
         )
 
+    def warm_up(self, timeout: float = 10.0) -> None:
+        """Open connections with small authenticated calls to both APIs."""
+        try:
+            self._tts_client.list_voices(language_code="en-US", timeout=timeout)
+        except Exception as exc:
+            raise RuntimeError(f"Gemini TTS warm-up failed: {exc}") from exc
+        try:
+            self._genai_client.models.get(
+                model=self.model,
+                config={"http_options": {"timeout": int(timeout * 1000)}},
+            )
+        except Exception as exc:
+            raise RuntimeError(f"Gemini warm-up failed: {exc}") from exc
+
     def translate_text(
         self,
         text: str,
         input_language: str,
         output_language: str,
         timeout: float = 60.0,
+        examples: Optional[Sequence[Tuple[str, str]]] = None,
     ) -> str:
         if input_language.lower() == output_language.lower():
             return text
@@ -43,8 +84,16 @@ class GeminiTtsClient:
             "Translate the following text from "
             f"{input_language} to {output_language}. "
             "Return only the translated text without commentary.\n\n"
-            f"{text}"
         )
+        if examples:
+            prompt += (
+                "Previously approved translations of similar passages "
+                "(keep wording consistent where the source matches):\n\n"
+            )
+            for source, translation in examples:
+                prompt += f"Source: {source}\nTranslation: {translation}\n\n"
+            prompt += "Text to translate:\n\n"
+        prompt += text
 
         try:
             config = {"temperature": 0.2}
@@ -103,15 +152,14 @@ class GeminiTtsClient:
                     return str(part_text)
         return ""
 
-    def synthesize_ssml(
+    def _synthesis_request(
         self,
         ssml: str,
         voice_name: Optional[str],
         language_code: str,
         sample_rate_hz: int,
         volume_gain_db: float,
-        timeout: float = 120.0,
-    ) -> bytes:
+    ):
         input_config = texttospeech.SynthesisInput(ssml=ssml)
         voice_params = texttospeech.VoiceSelectionParams(
             language_code=language_code,
@@ -122,9 +170,22 @@ class GeminiTtsClient:
             sample_rate_hertz=sample_rate_hz,
             volume_gain_db=volume_gain_db,
         )
+        return input_config, voice_params, audio_config
 
+    def _synthesize_response(
+        self,
+        ssml: str,
+        voice_name: Optional[str],
+        language_code: str,
+        sample_rate_hz: int,
+        volume_gain_db: float,
+        timeout: float,
+    ):
+        input_config, voice_params, audio_config = self._synthesis_request(
+            ssml, voice_name, language_code, sample_rate_hz, volume_gain_db
+        )
         try:
-            response = self._tts_client.synthesize_speech(
+            return self._tts_client.synthesize_speech(
                 input=input_config,
                 voice=voice_params,
                 audio_config=audio_config,
@@ -133,7 +194,62 @@ class GeminiTtsClient:
         except Exception as exc:
             raise RuntimeError(f"Gemini TTS request failed: {exc}") from exc
 
+    def synthesize_ssml(
+        self,
+        ssml: str,
+        voice_name: Optional[str],
+        language_code: str,
+        sample_rate_hz: int,
+        volume_gain_db: float,
+        timeout: float = 120.0,
+    ) -> bytes:
+        response = self._synthesize_response(
+            ssml, voice_name, language_code, sample_rate_hz, volume_gain_db, timeout
+        )
+        audio_content = response.audio_content
+        if not audio_content:
+            raise RuntimeError("No audio content returned from TTS API.")
+        return audio_content
+
+    def synthesize_ssml_to_file(
+        self,
+        ssml: str,
+        destination: Path,
+        voice_name: Optional[str],
+        language_code: str,
+        sample_rate_hz: int,
+        volume_gain_db: float,
+        timeout: float = 120.0,
+    ) -> int:
+        """Synthesize ``ssml`` and write the MP3 to ``destination``.
+
+        The audio is written to a uniquely named temporary file next to
+        ``destination`` and renamed into place once complete, so a failed
+        request never leaves a truncated MP3 behind. The API returns the
+        whole clip in one response; memory per call is bounded only by the
+        SSML size (``MAX_SSML_CHARS`` chunking). Returns the bytes written.
+        """
+        response = self._synthesize_response(
+            ssml, voice_name, language_code, sample_rate_hz, volume_gain_db, timeout
+        )
         audio_content = response.audio_content
+        # Drop the response so only the single audio buffer stays alive.
+        del response
         if not audio_content:
             raise RuntimeError("No audio content returned from TTS API.")
-        return audio_content
\ No newline at end of file
+
+        fd, temp_name = tempfile.mkstemp(
+            dir=destination.parent, prefix=f".{destination.name}.", suffix=".part"
+        )
+        try:
+            # mkstemp creates files as 0600; match what a plain open() gives.
+            os.fchmod(fd, FILE_MODE)
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(audio_content)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temp_name, destination)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        return len(audio_content)
@@ -0,0 +1,462 @@
+"""Concurrent load test for the FastAPI service against a stub backend.
+
+Starts ``uvicorn`` in a subprocess with the Google SDK modules used by
+``app.tts_client`` replaced by stubs (configurable latency, backend
+concurrency and failure rate), fires concurrent ``/process`` jobs while
+background workers hit ``/download``, checks that every job's audio is
+distinct and downloadable, and writes a JSON report meant to be diffed
+between versions::
+
+    python tests/loadtest.py --jobs 20 --workers 2 --output report.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+WORDS = (
+    "podcast episode guest story language voice music question answer "
+    "today future people technology research market city science history"
+).split()
+LAG_INTERVAL = 0.05
+
+
+class _StubBackend:
+    """Latency, throttling and failures shared by the stub SDK clients."""
+
+    translate_latency = float(os.getenv("LOADTEST_TRANSLATE_LATENCY", "0.05"))
+    synth_latency = float(os.getenv("LOADTEST_SYNTH_LATENCY", "0.2"))
+    failure_rate = float(os.getenv("LOADTEST_FAILURE_RATE", "0"))
+    audio_bytes = int(os.getenv("LOADTEST_AUDIO_BYTES", str(512 * 1024)))
+    _slots = threading.BoundedSemaphore(
+        int(os.getenv("LOADTEST_BACKEND_CONCURRENCY", "8"))
+    )
+    _random = random.Random(0)
+    _random_lock = threading.Lock()
+
+    @classmethod
+    def call(cls, latency: float, name: str) -> None:
+        # Blocks while the backend is saturated, which is how throttling
+        # shows up to the service: as added latency on every call.
+        with cls._slots:
+            time.sleep(latency)
+            with cls._random_lock:
+                failed = cls._random.random() < cls.failure_rate
+            if failed:
+                raise RuntimeError(f"Stub {name} failure")
+
+
+class _StubGenAIModels:
+    def generate_content(self, model, contents, config=None):
+        _StubBackend.call(_StubBackend.translate_latency, "translation")
+        return SimpleNamespace(text=contents.rsplit("\n\n", 1)[-1].upper())
+
+    def get(self, model, config=None):
+        _StubBackend.call(_StubBackend.translate_latency, "model lookup")
+        return SimpleNamespace(name=model)
+
+
+class _StubTextToSpeechClient:
+    def __init__(self, client_options=None):
+        self.client_options = client_options
+
+    def synthesize_speech(self, input, voice, audio_config, timeout=None):
+        _StubBackend.call(_StubBackend.synth_latency, "TTS")
+        return SimpleNamespace(audio_content=os.urandom(_StubBackend.audio_bytes))
+
+    def list_voices(self, language_code=None, timeout=None):
+        _StubBackend.call(_StubBackend.translate_latency, "voice list")
+        return SimpleNamespace(voices=[])
+
+
+# Stand-ins for the ``google.genai`` and ``google.cloud.texttospeech``
+# modules, so everything above the SDK boundary (GeminiTtsClient,
+# translation memory, atomic audio writes) runs for real.
+stub_genai = SimpleNamespace(
+    Client=lambda api_key=None, **kwargs: SimpleNamespace(models=_StubGenAIModels()),
+    types=SimpleNamespace(GenerateContentConfig=lambda **kwargs: kwargs),
+)
+stub_texttospeech = SimpleNamespace(
+    TextToSpeechClient=_StubTextToSpeechClient,
+    SynthesisInput=lambda **kwargs: kwargs,
+    VoiceSelectionParams=lambda **kwargs: kwargs,
+    AudioConfig=lambda **kwargs: kwargs,
+    AudioEncoding=SimpleNamespace(MP3="MP3"),
+)
+
+
+async def _monitor_loop_lag(path: Path) -> None:
+    with path.open("a", encoding="utf-8") as handle:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = time.perf_counter() - started - LAG_INTERVAL
+            handle.write(f"{max(lag, 0.0):.6f}\n")
+            handle.flush()
+
+
+def create_app():
+    """uvicorn factory: the real app with stub SDK modules and a lag monitor."""
+    from app import main, tts_client
+
+    tts_client.genai = stub_genai
+    tts_client.texttospeech = stub_texttospeech
+    original_lifespan = main.app.router.lifespan_context
+    lag_dir = main.DATA_DIR / "loadtest"
+    lag_dir.mkdir(parents=True, exist_ok=True)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(
+            _monitor_loop_lag(lag_dir / f"lag-{os.getpid()}.txt")
+        )
+        try:
+            async with original_lifespan(app):
+                yield
+        finally:
+            task.cancel()
+
+    main.app.router.lifespan_context = lifespan
+    return main.app
+
+
+def make_episode(index: int, segments: int, words: int) -> bytes:
+    rng = random.Random(index)
+    lines = []
+    for number in range(segments):
+        minutes, seconds = divmod(number * 7, 60)
+        lines.append(f"Speaker {number % 2 + 1} 00:{minutes:02d}:{seconds:02d}")
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(words)) + ".")
+    return "\n".join(lines).encode("utf-8")
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return dict.fromkeys(("p50_ms", "p95_ms", "p99_ms", "max_ms"), None) | {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        index = max(0, min(len(ordered) - 1, math.ceil(p * len(ordered)) - 1))
+        return round(ordered[index] * 1000, 1)
+
+    return {
+        "count": len(ordered),
+        "p50_ms": rank(0.50),
+        "p95_ms": rank(0.95),
+        "p99_ms": rank(0.99),
+        "max_ms": round(ordered[-1] * 1000, 1),
+    }
+
+
+def _process_tree(pid: int) -> List[int]:
+    pids = [pid]
+    for current in pids:
+        for task in Path(f"/proc/{current}/task").glob("*/children"):
+            try:
+                pids.extend(int(child) for child in task.read_text().split())
+            except OSError:
+                continue
+    return pids
+
+
+def sample_resources(pid: int) -> Optional[Dict[str, int]]:
+    """Sum RSS (bytes) and open fds over ``pid`` and its children. Linux only."""
+    if not Path(f"/proc/{pid}").exists():
+        return None
+    rss = 0
+    fds = 0
+    for member in _process_tree(pid):
+        try:
+            for line in Path(f"/proc/{member}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    rss += int(line.split()[1]) * 1024
+            fds += len(os.listdir(f"/proc/{member}/fd"))
+        except OSError:
+            continue
+    return {"rss": rss, "fds": fds}
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.job_failures: Dict[str, int] = {}
+
+    def fail_job(self, reason: str) -> None:
+        self.job_failures[reason] = self.job_failures.get(reason, 0) + 1
+
+    def record(self, name: str, seconds: float, ok: bool = True) -> None:
+        self.latencies.setdefault(name, []).append(seconds)
+        self.errors.setdefault(name, 0)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        return {
+            name: {**percentiles(values), "errors": self.errors[name]}
+            for name, values in sorted(self.latencies.items())
+        }
+
+
+async def run_job(client, index: int, args, recorder: Recorder, ttfe: List[float],
+                  downloads: List[str], owners: Dict[str, int]) -> None:
+    content = make_episode(index, args.segments, args.words)
+    started = time.perf_counter()
+    names: List[str] = []
+    failure: Optional[str] = "no result event"
+    try:
+        async with client.stream(
+            "POST",
+            "/process",
+            files={"file": (f"episode-{index}.txt", content, "text/plain")},
+            data={"input_language": "ru-RU", "output_language": "en-US"},
+        ) as response:
+            recorder.record(
+                "POST /process", time.perf_counter() - started, response.is_success
+            )
+            first = True
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                if first:
+                    ttfe.append(time.perf_counter() - started)
+                    first = False
+                event = json.loads(line)
+                if event.get("type") == "error":
+                    failure = "error event"
+                elif event.get("type") == "result":
+                    failure = None
+                    names = [
+                        url.split("path=", 1)[1] for url in event.get("downloads", [])
+                    ]
+    except Exception:
+        failure = "request failed"
+
+    if failure is None:
+        failure = await verify_downloads(client, index, names, args, owners)
+    if failure is None:
+        downloads.extend(names)
+    else:
+        recorder.fail_job(failure)
+    recorder.record("job total", time.perf_counter() - started, failure is None)
+
+
+async def verify_downloads(client, index: int, names: List[str], args,
+                           owners: Dict[str, int]) -> Optional[str]:
+    """Return why a job's audio is unusable, or ``None`` if it is fine."""
+    if not names:
+        return "no downloads"
+    for name in names:
+        if owners.setdefault(name, index) != index:
+            return "download shared with another job"
+    for name in names:
+        try:
+            response = await client.get("/download", params={"path": name})
+        except Exception:
+            return "download failed"
+        if not response.is_success:
+            return "download failed"
+        if len(response.content) != args.audio_bytes:
+            return "download size mismatch"
+    return None
+
+
+async def download_worker(client, recorder: Recorder, downloads: List[str],
+                          stop: asyncio.Event, interval: float) -> None:
+    rng = random.Random(id(recorder))
+    while not stop.is_set():
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = await client.get("/download", params={"path": rng.choice(downloads)})
+            ok = response.is_success
+        except Exception:
+            pass
+        recorder.record("GET /download", time.perf_counter() - started, ok)
+        await asyncio.sleep(interval)
+
+
+async def sample_worker(pid: int, samples: List[Dict], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        sample = sample_resources(pid)
+        if sample is not None:
+            samples.append(sample)
+        await asyncio.sleep(0.2)
+
+
+async def drive(base_url: str, pid: int, data_dir: Path, args) -> Dict:
+    import httpx
+
+    recorder = Recorder()
+    ttfe: List[float] = []
+    samples: List[Dict] = []
+    # Seed /download with a file so background traffic starts immediately.
+    seed = data_dir / "audio" / "loadtest-seed.mp3"
+    seed.parent.mkdir(parents=True, exist_ok=True)
+    seed.write_bytes(b"\0" * args.audio_bytes)
+    downloads = [seed.name]
+    owners: Dict[str, int] = {}
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        background = [
+            asyncio.create_task(
+                download_worker(client, recorder, downloads, stop, args.download_interval)
+            )
+            for _ in range(args.download_concurrency)
+        ]
+        background.append(asyncio.create_task(sample_worker(pid, samples, stop)))
+
+        gate = asyncio.Semaphore(args.concurrency or args.jobs)
+
+        async def gated(index: int) -> None:
+            async with gate:
+                await run_job(client, index, args, recorder, ttfe, downloads, owners)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(gated(index) for index in range(args.jobs)))
+        wall = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(*background)
+
+    lag: List[float] = []
+    for path in (data_dir / "loadtest").glob("lag-*.txt"):
+        lag.extend(float(line) for line in path.read_text().split())
+
+    return {
+        "config": {
+            key: getattr(args, key)
+            for key in sorted(vars(args))
+            if key not in {"output", "keep_data"}
+        },
+        "endpoints": recorder.summary(),
+        "job_failures": dict(sorted(recorder.job_failures.items())),
+        "time_to_first_event": percentiles(ttfe),
+        "event_loop_lag": percentiles(lag),
+        "server": {
+            "peak_rss_mb": round(max(s["rss"] for s in samples) / 2**20, 1) if samples else None,
+            "peak_open_fds": max(s["fds"] for s in samples) if samples else None,
+        },
+        "wall_seconds": round(wall, 2),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Server did not become ready in time")
+
+
+def run(args) -> Dict:
+    data_dir = Path(tempfile.mkdtemp(prefix="podcasts-loadtest-"))
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "APP_DATA_DIR": str(data_dir),
+        "GOOGLE_API_KEY": "loadtest",
+        "WARM_UP_CLIENTS": "0",
+        "LOADTEST_TRANSLATE_LATENCY": str(args.translate_latency),
+        "LOADTEST_SYNTH_LATENCY": str(args.synth_latency),
+        "LOADTEST_FAILURE_RATE": str(args.failure_rate),
+        "LOADTEST_BACKEND_CONCURRENCY": str(args.backend_concurrency),
+        "LOADTEST_AUDIO_BYTES": str(args.audio_bytes),
+    }
+    if args.max_ssml_chars:
+        env["MAX_SSML_CHARS"] = str(args.max_ssml_chars)
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "loadtest:create_app", "--factory",
+            "--app-dir", str(Path(__file__).resolve().parent),
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        _wait_ready(base_url, server)
+        return asyncio.run(drive(base_url, server.pid, data_dir, args))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        if not args.keep_data:
+            import shutil
+
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10, help="number of /process jobs")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="max in-flight jobs (default: all at once)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--segments", type=int, default=20, help="segments per episode")
+    parser.add_argument("--words", type=int, default=40, help="words per segment")
+    parser.add_argument("--max-ssml-chars", type=int, default=0,
+                        help="override MAX_SSML_CHARS on the server")
+    parser.add_argument("--translate-latency", type=float, default=0.05)
+    parser.add_argument("--synth-latency", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--backend-concurrency", type=int, default=8,
+                        help="concurrent stub backend calls per worker before throttling")
+    parser.add_argument("--audio-bytes", type=int, default=512 * 1024)
+    parser.add_argument("--download-concurrency", type=int, default=4)
+    parser.add_argument("--download-interval", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--keep-data", action="store_true",
+                        help="keep the temporary APP_DATA_DIR")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    report = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        args.output.write_text(f"{report}\n", encoding="utf-8")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
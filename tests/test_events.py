@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.events import JobEventLog, follow_events, prune_event_logs, read_events
+
+
+def test_emit_assigns_increasing_ids(tmp_path):
+    events = JobEventLog("job", tmp_path / "job.ndjson")
+
+    events.log("first")
+    events.log("second")
+    events.result(status="ok")
+
+    payloads, _ = read_events(events.path)
+    assert [payload["id"] for payload in payloads] == [1, 2, 3]
+    assert payloads[-1]["type"] == "result"
+    assert payloads[-1]["event_count"] == 3
+
+
+def test_read_events_leaves_partial_line(tmp_path):
+    path = tmp_path / "job.ndjson"
+    path.write_text('{"id": 1, "type": "log"}\n{"id": 2, "ty', encoding="utf-8")
+
+    payloads, offset = read_events(path)
+    assert [payload["id"] for payload in payloads] == [1]
+
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('pe": "log"}\n')
+    payloads, _ = read_events(path, offset)
+    assert [payload["id"] for payload in payloads] == [2]
+
+
+def test_only_first_terminal_event_is_written(tmp_path):
+    events = JobEventLog("job", tmp_path / "job.ndjson")
+
+    events.result(status="ok")
+    assert events.error("late failure") is None
+
+    payloads, _ = read_events(events.path)
+    assert [payload["type"] for payload in payloads] == ["result"]
+
+
+@pytest.mark.anyio
+async def test_follow_events_ends_orphaned_job_without_writing(tmp_path):
+    events = JobEventLog("job", tmp_path / "job.ndjson")
+    events.log("started")
+    stale = time.time() - 60
+    os.utime(events.path, (stale, stale))
+    before = events.path.read_bytes()
+
+    async def follow():
+        return [
+            event
+            async for event in follow_events(
+                events.path, poll_interval=0.01, stale_after=30
+            )
+        ]
+
+    first, second = await asyncio.gather(follow(), follow())
+
+    assert first == second
+    assert [payload["type"] for payload in first] == ["log", "error"]
+    assert first[-1]["id"] == 2
+    assert first[-1]["orphaned"] is True
+    assert events.path.read_bytes() == before
+
+
+def test_prune_event_logs_removes_old_logs(tmp_path):
+    old = tmp_path / "old.ndjson"
+    new = tmp_path / "new.ndjson"
+    old.touch()
+    new.touch()
+    stale = time.time() - 3600
+    os.utime(old, (stale, stale))
+
+    assert prune_event_logs(tmp_path, 60) == 1
+    assert list(tmp_path.iterdir()) == [new]
@@ -0,0 +1,49 @@
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("google.cloud.texttospeech", "google.genai", "grpc")
+# Modules app.main cannot avoid importing; their cost is the baseline.
+BASELINE_IMPORTS = (
+    "fastapi, fastapi.responses, fastapi.staticfiles, fastapi.templating, "
+    "dotenv, multipart"
+)
+# app.main may cost at most this multiple of the baseline. Today it is
+# about 1.1x; importing grpc/texttospeech eagerly roughly doubles it.
+IMPORT_BUDGET_RATIO = 1.5
+RUNS = 5
+
+
+def run_python(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+def import_seconds(modules: str) -> float:
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"import {modules}; print(time.perf_counter() - started)"
+    )
+    return statistics.median(float(run_python(code)) for _ in range(RUNS))
+
+
+def test_app_import_defers_google_clients():
+    output = run_python(
+        "import sys, app.main; "
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    assert output == "[]"
+
+
+def test_app_import_time_relative_to_web_stack():
+    baseline = import_seconds(BASELINE_IMPORTS)
+    app_main = import_seconds("app.main")
+    assert app_main < baseline * IMPORT_BUDGET_RATIO, (app_main, baseline)
@@ -0,0 +1,54 @@
+import json
+
+import loadtest
+
+
+def test_percentiles_nearest_rank():
+    summary = loadtest.percentiles([i / 1000 for i in range(1, 101)])
+
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 50.0
+    assert summary["p95_ms"] == 95.0
+    assert summary["p99_ms"] == 99.0
+    assert loadtest.percentiles([])["p50_ms"] is None
+
+
+def test_load_test_report(tmp_path):
+    output = tmp_path / "report.json"
+
+    loadtest.main([
+        "--jobs", "2",
+        "--segments", "2",
+        "--words", "5",
+        "--synth-latency", "0.01",
+        "--translate-latency", "0.0",
+        "--audio-bytes", "1024",
+        "--download-concurrency", "1",
+        "--output", str(output),
+    ])
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["endpoints"]["job total"]["count"] == 2
+    assert report["endpoints"]["job total"]["errors"] == 0
+    assert report["job_failures"] == {}
+    assert report["time_to_first_event"]["count"] == 2
+    assert "GET /download" in report["endpoints"]
+    assert report["event_loop_lag"]["count"] > 0
+
+
+
+def test_stub_sdk_runs_real_client(tmp_path, monkeypatch):
+    from app import tts_client
+
+    monkeypatch.setattr(tts_client, "genai", loadtest.stub_genai)
+    monkeypatch.setattr(tts_client, "texttospeech", loadtest.stub_texttospeech)
+    monkeypatch.setattr(loadtest._StubBackend, "synth_latency", 0.0)
+    monkeypatch.setattr(loadtest._StubBackend, "translate_latency", 0.0)
+    monkeypatch.setattr(loadtest._StubBackend, "audio_bytes", 16)
+    client = tts_client.GeminiTtsClient(api_key="loadtest")
+
+    assert client.translate_text("hello", "en", "es") == "HELLO"
+    written = client.synthesize_ssml_to_file(
+        "<speak>hi</speak>", tmp_path / "out.mp3", None, "en-US", 24000, 0.0
+    )
+    assert written == 16
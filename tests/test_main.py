@@ -1,17 +1,23 @@
 import json
+import threading
+import time
 from io import BytesIO
 
 import pytest
 from starlette.datastructures import UploadFile
 
 from app import main
+from app.models import TranslationMemoryStats
+from app.translation_memory import TranslationMemory
 
 
 class DummyClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
 
-    def translate_text(self, text: str, input_language: str, output_language: str):
+    def translate_text(
+        self, text: str, input_language: str, output_language: str, examples=None
+    ):
         return text
 
     def synthesize_ssml(
@@ -24,17 +30,47 @@ class DummyClient:
     ) -> bytes:
         return b"audio"
 
+    def synthesize_ssml_to_file(
+        self,
+        ssml: str,
+        destination,
+        voice_name: str | None,
+        language_code: str,
+        sample_rate_hz: int,
+        volume_gain_db: float,
+    ) -> int:
+        destination.write_bytes(b"audio")
+        return len(b"audio")
 
-@pytest.mark.anyio
-async def test_process_file_streams_after_upload_closed(monkeypatch, tmp_path):
+
+def setup_app(monkeypatch, tmp_path):
     monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
     monkeypatch.setattr(main, "DATA_DIR", tmp_path)
     monkeypatch.setattr(main, "UPLOAD_DIR", tmp_path / "uploads")
     monkeypatch.setattr(main, "ARTIFACT_DIR", tmp_path / "artifacts")
     monkeypatch.setattr(main, "AUDIO_DIR", tmp_path / "audio")
+    monkeypatch.setattr(main, "JOB_DIR", tmp_path / "jobs")
     monkeypatch.setattr(main, "GeminiTtsClient", DummyClient)
+    monkeypatch.setattr(main, "_CLIENT", None)
     main.ensure_dirs()
 
+
+async def read_payloads(response):
+    chunks = []
+    async for chunk in response.body_iterator:
+        chunks.append(chunk)
+
+    body = "".join(
+        chunk.decode("utf-8") if isinstance(chunk, (bytes, bytearray)) else chunk
+        for chunk in chunks
+    )
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+@pytest.mark.anyio
+async def test_process_file_streams_after_upload_closed(monkeypatch, tmp_path):
+    setup_app(monkeypatch, tmp_path)
+
     content = b"Speaker 1 00:00:01\nHello world"
     upload = UploadFile(filename="sample.txt", file=BytesIO(content))
 
@@ -49,13 +85,201 @@ async def test_process_file_streams_after_upload_closed(monkeypatch, tmp_path):
 
     await upload.close()
 
-    chunks = []
-    async for chunk in response.body_iterator:
-        chunks.append(chunk)
+    payloads = await read_payloads(response)
+    assert any(payload.get("type") == "result" for payload in payloads)
 
-    body = "".join(
-        chunk.decode("utf-8") if isinstance(chunk, (bytes, bytearray)) else chunk
-        for chunk in chunks
+
+@pytest.mark.anyio
+async def test_job_events_resume_after_last_id(monkeypatch, tmp_path):
+    setup_app(monkeypatch, tmp_path)
+
+    content = b"Speaker 1 00:00:01\nHello world"
+    upload = UploadFile(filename="sample.txt", file=BytesIO(content))
+    response = await main.process_file(
+        file=upload,
+        input_language="en-US",
+        output_language="en-US",
+        sample_rate_hz=24000,
+        volume_gain_db=0.0,
+        voice_map_json="{}",
     )
-    payloads = [json.loads(line) for line in body.splitlines() if line.strip()]
-    assert any(payload.get("type") == "result" for payload in payloads)
\ No newline at end of file
+    payloads = await read_payloads(response)
+
+    ids = [payload["id"] for payload in payloads]
+    assert ids == list(range(1, len(payloads) + 1))
+    assert payloads[0]["type"] == "job"
+    result = payloads[-1]
+    assert result["type"] == "result"
+    assert "logs" not in result
+    assert result["event_count"] == len(payloads)
+
+    job_id = payloads[0]["job_id"]
+    resumed = await read_payloads(await main.job_events(job_id, after=3))
+    assert resumed == payloads[3:]
+
+
+@pytest.mark.anyio
+async def test_concurrent_jobs_write_distinct_outputs(monkeypatch, tmp_path):
+    setup_app(monkeypatch, tmp_path)
+
+    results = []
+    for _ in range(2):
+        upload = UploadFile(
+            filename="sample.txt", file=BytesIO(b"Speaker 1 00:00:01\nHello world")
+        )
+        response = await main.process_file(
+            file=upload,
+            input_language="en-US",
+            output_language="en-US",
+            sample_rate_hz=24000,
+            volume_gain_db=0.0,
+            voice_map_json="{}",
+        )
+        results.append(response)
+    payloads = [(await read_payloads(response))[-1] for response in results]
+
+    assert payloads[0]["downloads"] != payloads[1]["downloads"]
+    assert payloads[0]["artifact"] != payloads[1]["artifact"]
+    assert len(list((tmp_path / "audio").iterdir())) == 2
+
+
+@pytest.mark.anyio
+async def test_job_events_unknown_job(monkeypatch, tmp_path):
+    setup_app(monkeypatch, tmp_path)
+
+    with pytest.raises(main.HTTPException) as excinfo:
+        await main.job_events("../secrets")
+    assert excinfo.value.status_code == 404
+
+
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    def translate_text(self, text, input_language, output_language, examples=None):
+        self.calls.append((text, examples))
+        return f"translated: {text}"
+
+
+def test_translate_with_memory_reuses_and_adds_context(tmp_path):
+    intro = "Welcome to episode twelve of the show about technology and people."
+    memory = TranslationMemory(tmp_path / "tm.jsonl")
+    stats = TranslationMemoryStats()
+    client = RecordingClient()
+
+    first = main._translate_with_memory(client, memory, stats, intro, "en", "es")
+    second = main._translate_with_memory(client, memory, stats, intro, "en", "es")
+    variant = intro.replace("twelve", "thirteen")
+    main._translate_with_memory(client, memory, stats, variant, "en", "es")
+
+    assert first == second
+    assert stats.lookups == 3
+    assert stats.reused == 1
+    assert stats.saved_chars == len(intro)
+    assert stats.context == 1
+    assert client.calls[-1] == (variant, [(intro, first)])
+
+
+def test_ready_reports_warm_up_state(monkeypatch):
+    attempts = []
+
+    class FlakyClient(DummyClient):
+        def warm_up(self):
+            attempts.append(self)
+            if len(attempts) < 3:
+                raise RuntimeError("no network")
+
+    class BrokenClient(DummyClient):
+        def warm_up(self):
+            raise RuntimeError("no network")
+
+    monkeypatch.setattr(main, "_WARM_UP", dict(main._WARM_UP))
+    monkeypatch.setattr(main, "_CLIENT", None)
+
+    assert main.ready().status_code == 200
+
+    monkeypatch.setattr(main, "GeminiTtsClient", BrokenClient)
+    main.warm_up_clients("test-key", sleep=lambda seconds: None)
+    response = main.ready()
+    clients = json.loads(response.body)["clients"]
+    assert response.status_code == 200
+    assert clients["status"] == "failed"
+    assert clients["error"] == "no network"
+    assert clients["attempts"] == main.WARM_UP_ATTEMPTS
+
+    monkeypatch.setattr(main, "_CLIENT", None)
+    monkeypatch.setattr(main, "GeminiTtsClient", FlakyClient)
+    delays = []
+    main.warm_up_clients("test-key", sleep=delays.append)
+    assert json.loads(main.ready().body)["clients"]["status"] == "warm"
+    assert delays == [1, 2]
+    assert main.get_client("test-key") is main.get_client("test-key")
+
+    main._WARM_UP["status"] = "warming"
+    assert main.ready().status_code == 503
+
+
+
+def test_translate_with_memory_never_reuses_changed_numbers(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "TM_REUSE_THRESHOLD", 0.95)
+    intro = (
+        "Welcome back to Tech Talk, the weekly show where we sit down with "
+        "engineers, founders and researchers to talk about how software is "
+        "actually built. I am your host, and this is episode 112. Before we "
+        "start, a quick reminder that you can support the show on our website, "
+        "leave us a review wherever you listen, and send questions for future "
+        "guests. Today we have a fantastic conversation lined up about "
+        "distributed systems, so grab a coffee and settle in."
+    )
+    memory = TranslationMemory(tmp_path / "tm.jsonl")
+    stats = TranslationMemoryStats()
+    client = RecordingClient()
+    main._translate_with_memory(client, memory, stats, intro, "en", "es")
+
+    changed = intro.replace("112", "113")
+    match = memory.lookup(changed, "en", "es")
+    assert match.similarity >= 0.95
+    translated = main._translate_with_memory(client, memory, stats, changed, "en", "es")
+
+    assert translated == f"translated: {changed}"
+    assert stats.reused == 0
+    assert stats.context == 1
+
+
+def test_translate_with_memory_reuses_exact_match_only_by_default(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.jsonl")
+    stats = TranslationMemoryStats()
+    client = RecordingClient()
+    main._translate_with_memory(client, memory, stats, "Are you ready?", "en", "es")
+
+    main._translate_with_memory(client, memory, stats, "Are you ready.", "en", "es")
+    main._translate_with_memory(client, memory, stats, "Are  you ready?", "en", "es")
+
+    assert stats.reused == 1
+    assert [text for text, _ in client.calls] == ["Are you ready?", "Are you ready."]
+
+
+
+def test_ready_stops_waiting_for_stalled_warm_up(monkeypatch):
+    release = threading.Event()
+
+    class StalledClient(DummyClient):
+        def warm_up(self):
+            release.wait(5)
+
+    monkeypatch.setattr(main, "_WARM_UP", dict(main._WARM_UP))
+    monkeypatch.setattr(main, "_CLIENT", None)
+    monkeypatch.setattr(main, "GeminiTtsClient", StalledClient)
+    monkeypatch.setattr(main, "WARM_UP_DEADLINE_SECONDS", 0.2)
+    thread = threading.Thread(target=main.warm_up_clients, args=("test-key",))
+    thread.start()
+    try:
+        time.sleep(0.05)
+        assert main.ready().status_code == 503
+        time.sleep(0.3)
+        response = main.ready()
+        assert response.status_code == 200
+        assert json.loads(response.body)["clients"]["status"] == "warming"
+    finally:
+        release.set()
+        thread.join()
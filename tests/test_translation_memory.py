@@ -0,0 +1,114 @@
+import stat
+
+from app import tts_client
+from app.translation_memory import TranslationMemory
+
+INTRO = (
+    "Welcome to the show about technology and people. "
+    "Today we talk with our guest about the future of podcasts."
+)
+
+
+def test_lookup_finds_near_duplicate(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.jsonl")
+    memory.add(INTRO, "Bienvenidos", "en-US", "es-ES")
+
+    match = memory.lookup(
+        INTRO.replace("Today", "This week"), "en-US", "es-ES", min_similarity=0.5
+    )
+
+    assert match is not None
+    assert match.translation == "Bienvenidos"
+    assert 0.5 <= match.similarity < 1.0
+
+
+def test_lookup_is_scoped_to_language_pair(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.jsonl")
+    memory.add(INTRO, "Bienvenidos", "en-US", "es-ES")
+
+    assert memory.lookup(INTRO, "en-US", "de-DE") is None
+    assert memory.lookup("Completely unrelated sentence here.", "en-US", "es-ES") is None
+
+
+def test_memory_persists_and_deduplicates(tmp_path):
+    path = tmp_path / "tm.jsonl"
+    memory = TranslationMemory(path)
+    memory.add(INTRO, "Bienvenidos", "en-US", "es-ES")
+    memory.add(f"  {INTRO.replace(' ', '   ')} ", "Otra", "en-US", "es-ES")
+
+    reloaded = TranslationMemory(path)
+
+    assert len(reloaded) == 1
+    match = reloaded.lookup(INTRO, "en-US", "es-ES")
+    assert match.similarity == 1.0
+    assert match.translation == "Bienvenidos"
+
+
+def test_memory_evicts_least_recently_used(tmp_path):
+    path = tmp_path / "tm.jsonl"
+    memory = TranslationMemory(path, max_entries=2)
+    memory.add("first segment text here", "uno", "en-US", "es-ES")
+    memory.add("second segment text here", "dos", "en-US", "es-ES")
+    memory.lookup("first segment text here", "en-US", "es-ES")
+    memory.add("third segment text here", "tres", "en-US", "es-ES")
+
+    assert len(memory) == 2
+    assert memory.lookup("second segment text here", "en-US", "es-ES", 0.99) is None
+    assert memory.lookup("first segment text here", "en-US", "es-ES").translation == "uno"
+    assert len(TranslationMemory(path, max_entries=2)) == 2
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_memory_skips_truncated_line(tmp_path):
+    path = tmp_path / "tm.jsonl"
+    memory = TranslationMemory(path)
+    memory.add(INTRO, "Bienvenidos", "en-US", "es-ES")
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"source": "Trunc')
+
+    reloaded = TranslationMemory(path)
+    reloaded.add("Another segment entirely.", "Otro", "en-US", "es-ES")
+
+    assert len(TranslationMemory(path)) == 2
+    rejected = tmp_path / "tm.jsonl.rejected"
+    assert rejected.read_text(encoding="utf-8") == '{"source": "Trunc\n'
+
+
+
+def test_exact_match_keeps_punctuation(tmp_path):
+    memory = TranslationMemory(tmp_path / "tm.jsonl")
+    memory.add("Are you ready?", "¿Estás listo?", "en-US", "es-ES")
+
+    match = memory.lookup("Are you ready.", "en-US", "es-ES")
+
+    assert match is not None
+    assert not match.exact
+    assert memory.lookup("Are you ready?", "en-US", "es-ES").exact
+
+
+def test_compaction_keeps_entries_from_other_workers(tmp_path):
+    path = tmp_path / "tm.jsonl"
+    path.touch()
+    first = TranslationMemory(path, max_entries=2)
+    second = TranslationMemory(path, max_entries=2)
+
+    first.add("first segment from worker one", "a", "en-US", "es-ES")
+    first.add("second segment from worker one", "b", "en-US", "es-ES")
+    first.add("third segment from worker one", "c", "en-US", "es-ES")
+    second.add("only segment from worker two", "z", "en-US", "es-ES")
+    # Worker one has now appended four lines, which triggers compaction.
+    first.add("fourth segment from worker one", "d", "en-US", "es-ES")
+
+    on_disk = path.read_text(encoding="utf-8").splitlines()
+    assert len(on_disk) == 2
+    assert "worker two" in on_disk[0]
+    assert "fourth segment" in on_disk[1]
+
+
+def test_compaction_rewrite_keeps_file_mode(tmp_path):
+    path = tmp_path / "tm.jsonl"
+    path.write_text('{"source": "Trunc\n', encoding="utf-8")
+
+    TranslationMemory(path)
+
+    assert stat.S_IMODE(path.stat().st_mode) == tts_client.FILE_MODE
@@ -1,5 +1,9 @@
+import stat
+import threading
 from types import SimpleNamespace
 
+import pytest
+
 from app import tts_client
 
 
@@ -16,6 +20,10 @@ class DummyModels:
         self.parent.calls.append((model, contents, config))
         return DummyResponse("Hola")
 
+    def get(self, model, config=None):
+        self.parent.calls.append((model, None, config))
+        return SimpleNamespace(name=model)
+
 
 class DummyGenAIClient:
     def __init__(self, api_key=None):
@@ -47,10 +55,15 @@ class DummyTtsClient:
     def __init__(self, client_options=None):
         self.client_options = client_options
         self.calls = []
+        self.audio_content = b"audio"
 
     def synthesize_speech(self, input, voice, audio_config, timeout=None):
         self.calls.append((input, voice, audio_config, timeout))
-        return DummyTtsResponse(b"audio")
+        return DummyTtsResponse(self.audio_content)
+
+    def list_voices(self, language_code=None, timeout=None):
+        self.calls.append(("list_voices", language_code, timeout))
+        return SimpleNamespace(voices=[])
 
 
 class DummyTextToSpeechModule:
@@ -104,6 +117,29 @@ def test_translate_text_uses_generative_model(monkeypatch):
         assert config == {"temperature": 0.2}
 
 
+def test_translate_text_includes_examples(monkeypatch):
+    dummy_genai, _ = setup_clients(monkeypatch)
+    client = tts_client.GeminiTtsClient(api_key="test-key")
+
+    client.translate_text("Hello", "en", "es", examples=[("Hi", "Hola")])
+
+    _, prompt, _ = dummy_genai.last_client.calls[0]
+    assert "Source: Hi\nTranslation: Hola" in prompt
+    assert prompt.endswith("Hello")
+
+
+def test_warm_up_calls_both_apis(monkeypatch):
+    dummy_genai, dummy_tts = setup_clients(monkeypatch)
+    client = tts_client.GeminiTtsClient(api_key="test-key", model="gemini-test")
+
+    client.warm_up(timeout=3.0)
+
+    assert dummy_tts.last_client.calls == [("list_voices", "en-US", 3.0)]
+    assert dummy_genai.last_client.calls == [
+        ("gemini-test", None, {"http_options": {"timeout": 3000}})
+    ]
+
+
 def test_synthesize_ssml_uses_texttospeech_client(monkeypatch):
     _, dummy_tts = setup_clients(monkeypatch)
     client = tts_client.GeminiTtsClient(api_key="test-key")
@@ -125,4 +161,83 @@ def test_synthesize_ssml_uses_texttospeech_client(monkeypatch):
     assert voice_params.name == "voice-a"
     assert audio_config.sample_rate_hertz == 24000
     assert audio_config.volume_gain_db == 0.5
-    assert timeout == 10.0
\ No newline at end of file
+    assert timeout == 10.0
+
+
+def test_synthesize_ssml_to_file_writes_atomically(monkeypatch, tmp_path):
+    _, dummy_tts = setup_clients(monkeypatch)
+    client = tts_client.GeminiTtsClient(api_key="test-key")
+    dummy_tts.last_client.audio_content = b"0123456789"
+    destination = tmp_path / "out.mp3"
+
+    written = client.synthesize_ssml_to_file(
+        "<speak>Hello</speak>",
+        destination,
+        voice_name=None,
+        language_code="en-US",
+        sample_rate_hz=24000,
+        volume_gain_db=0.0,
+    )
+
+    assert written == 10
+    assert destination.read_bytes() == b"0123456789"
+    assert list(tmp_path.iterdir()) == [destination]
+    assert stat.S_IMODE(destination.stat().st_mode) == tts_client.FILE_MODE
+    plain = tmp_path / "plain"
+    plain.write_bytes(b"")
+    assert stat.S_IMODE(plain.stat().st_mode) == tts_client.FILE_MODE
+
+
+def test_synthesize_ssml_to_file_leaves_no_partial_file(monkeypatch, tmp_path):
+    setup_clients(monkeypatch)
+    client = tts_client.GeminiTtsClient(api_key="test-key")
+    destination = tmp_path / "out.mp3"
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(tts_client.os, "replace", fail)
+    with pytest.raises(OSError):
+        client.synthesize_ssml_to_file(
+            "<speak>Hello</speak>",
+            destination,
+            voice_name=None,
+            language_code="en-US",
+            sample_rate_hz=24000,
+            volume_gain_db=0.0,
+        )
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_synthesize_ssml_to_file_concurrent_writers(monkeypatch, tmp_path):
+    _, dummy_tts = setup_clients(monkeypatch)
+    client = tts_client.GeminiTtsClient(api_key="test-key")
+    dummy_tts.last_client.audio_content = b"x" * 1_000_000
+    destination = tmp_path / "out.mp3"
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def write():
+        barrier.wait()
+        try:
+            client.synthesize_ssml_to_file(
+                "<speak>Hello</speak>",
+                destination,
+                voice_name=None,
+                language_code="en-US",
+                sample_rate_hz=24000,
+                volume_gain_db=0.0,
+            )
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert destination.read_bytes() == b"x" * 1_000_000
+    assert list(tmp_path.iterdir()) == [destination]